@@ -1,8 +1,32 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
-def analyze_trades(df):
+def _max_streaks(flags):
+    """Longest runs of True and False in a boolean array.
+
+    Single linear pass using run-length encoding on the change points -
+    much cheaper than the groupby(cumsum-of-shifts) idiom.
+    """
+    if flags.size == 0:
+        return 0, 0
+    edges = np.flatnonzero(np.r_[True, flags[1:] != flags[:-1], True])
+    run_lens = np.diff(edges)
+    run_vals = flags[edges[:-1]]
+    max_true = int(run_lens[run_vals].max(initial=0))
+    max_false = int(run_lens[~run_vals].max(initial=0))
+    return max_true, max_false
+
+
+def _analyze_trades(df):
     """
     Enhanced trade analyzer with comprehensive metrics and insights.
     Revised to include ALL commissions and Time-Based Equity Curve.
@@ -10,23 +34,51 @@ def analyze_trades(df):
     # ==============================================================================
     # 1. CLEANUP & PREPARATION
     # ==============================================================================
-    df = df.copy()
-    df.columns = df.columns.str.strip()
-    
+    # Rename is cheap (no data copy); then copy only the columns we actually
+    # use so untouched columns don't get duplicated into memory
+    df = df.rename(columns=str.strip)
+    needed = ["TradeDate", "FifoPnlRealized", "IBCommission", "Quantity", "Symbol", "Buy/Sell"]
+    df = df.loc[:, [c for c in needed if c in df.columns]].copy()
+
     # Ensure standard columns exist and are numeric
     cols_to_numeric = ["FifoPnlRealized", "IBCommission", "Quantity"]
+    # float32 halves the bytes every later scan has to pull through memory;
+    # cent-level precision is preserved by doing the big reductions in float64.
+    # Columns that parsed as numeric skip the to_numeric coercion scan.
     for col in cols_to_numeric:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-            
+            s = df[col]
+            if not pd.api.types.is_numeric_dtype(s):
+                s = pd.to_numeric(s, errors="coerce")
+            df[col] = s.fillna(0).astype(np.float32, copy=False)
+
+    # Category codes make every groupby('Symbol') hash small ints, not strings
+    if "Symbol" in df.columns:
+        df["Symbol"] = df["Symbol"].astype("category")
+
     df["TradeDate"] = pd.to_datetime(df["TradeDate"])
+    # Unparseable dates arrive as NaT (the app coerces on load); drop those
+    # rows up front - NaT's int64 sentinel would otherwise land in a bogus
+    # weekday/month bucket and a trailing equity-curve day
+    if df["TradeDate"].hasnans:
+        df = df.loc[df["TradeDate"].notna()]
     
     # Calculate Per-Row Net (for grading individual actions)
     # Note: This is partial net (gross + exit fee usually)
     # FifoPnlRealized IS ALREADY NET (after commissions)
     
-    # Sort by date
-    df = df.sort_values("TradeDate").reset_index(drop=True)
+    # Sort by date (exports are usually already time-ordered - skip the
+    # O(n log n) sort when the column is monotonic)
+    if not df["TradeDate"].is_monotonic_increasing:
+        df = df.sort_values("TradeDate")
+    df = df.reset_index(drop=True)
+
+    # Pull the hot columns out as ndarrays once; the sections below do their
+    # math on these views and keep pandas for the groupby/index bookkeeping.
+    pnl_by_row = df["FifoPnlRealized"].to_numpy()
+    fees_by_row = df["IBCommission"].to_numpy()
+    dates_d = df["TradeDate"].to_numpy().astype('datetime64[D]')
+    mask_closed = pnl_by_row != 0
 
     # ==============================================================================
     # 2. GLOBAL FINANCIALS (The Fix for "Missing Commissions")
@@ -35,8 +87,9 @@ def analyze_trades(df):
     # even on opening trades or trades not yet closed.
     
     # FifoPnlRealized is ALREADY the net P/L (after commissions)
-    total_pnl_net = df["FifoPnlRealized"].sum()
-    total_fees = df["IBCommission"].sum()  # For informational purposes only
+    # Accumulate the big sums in float64 regardless of column dtype
+    total_pnl_net = float(pnl_by_row.sum(dtype=np.float64))
+    total_fees = float(fees_by_row.sum(dtype=np.float64))  # For informational purposes only
     
     # Commission Analysis
     commission_pct = (abs(total_fees) / abs(total_pnl_net) * 100) if total_pnl_net != 0 else 0
@@ -47,73 +100,80 @@ def analyze_trades(df):
     # 3. EQUITY CURVE (The Fix for "Weird Graphs")
     # ==============================================================================
     # Aggregate by Date first. This creates a proper time-series.
-    # Aggregate by date - FifoPnlRealized is already net
-    daily_stats = df.groupby(df["TradeDate"].dt.date)["FifoPnlRealized"].sum().to_frame()
-    daily_stats.rename(columns={"FifoPnlRealized": "DailyNet"}, inplace=True)
-    
-    # Create the curve
-    equity_curve = daily_stats["DailyNet"].cumsum()
-    
-    # Calculate drawdown based on the time series
-    running_max = equity_curve.cummax()
-    drawdown = equity_curve - running_max
-    max_drawdown = drawdown.min()
-    
+    # df is already sorted by TradeDate, so same-day rows are contiguous and a
+    # reduceat at the day boundaries replaces the hash-based groupby.
+    if len(df) > 0:
+        day_starts = np.flatnonzero(np.r_[True, dates_d[1:] != dates_d[:-1]])
+        daily_net_arr = np.add.reduceat(pnl_by_row, day_starts)
+        unique_days = dates_d[day_starts]
+    else:
+        daily_net_arr = np.array([])
+        unique_days = dates_d
+
+    # Curve, running max, and drawdown as plain NumPy accumulations over the
+    # daily array - one traversal each, no intermediate Series
+    equity_arr = np.cumsum(daily_net_arr, dtype=np.float64)
+    running_max = np.maximum.accumulate(equity_arr)
+    drawdown_arr = equity_arr - running_max
+    max_drawdown = drawdown_arr.min() if drawdown_arr.size else 0
+
     # Max DD % (Approximated based on running max equity, assuming starting at 0)
-    # Adding a small epsilon or handling 0 to avoid div by zero
     max_drawdown_pct = 0
-    if running_max.max() > 0:
+    if running_max.size and running_max.max() > 0:
         max_drawdown_pct = (max_drawdown / running_max.max() * 100)
 
-    # Drawdown duration (Time based now)
-    max_dd_duration = 0
-    if len(drawdown) > 0:
-        is_dd = drawdown < 0
-        # Calculate streaks of days in drawdown
-        dd_days = is_dd.astype(int).groupby(is_dd.ne(is_dd.shift()).cumsum()).cumsum()
-        max_dd_duration = dd_days.where(is_dd).max()
-        if pd.isna(max_dd_duration): max_dd_duration = 0
+    # Drawdown duration (time based) - longest run of days below the high
+    max_dd_duration, _ = _max_streaks(drawdown_arr < 0)
+
+    # Rewrap with the date index only for the returned time series
+    equity_curve = pd.Series(equity_arr, index=unique_days)
+    drawdown = pd.Series(drawdown_arr, index=unique_days)
 
     # ==============================================================================
     # 4. CLOSED TRADE STATISTICS (For Win Rate, Avg Win, etc.)
     # ==============================================================================
     # We still need to isolate "Closed Trades" to calculate Win Rate.
     # We cannot calculate a "Win Rate" on an opening buy order.
-    closed_trades = df[df["FifoPnlRealized"] != 0].copy()
+    # Reuse the P/L array from section 3 for the mask; no defensive copy -
+    # derived columns are added with .assign instead of in-place writes.
+    closed_trades = df.loc[mask_closed]
     
     total_trades = len(closed_trades)
-    
+
     if total_trades > 0:
-        wins = closed_trades[closed_trades["FifoPnlRealized"] > 0]
-        losses = closed_trades[closed_trades["FifoPnlRealized"] < 0]
-        breakeven = closed_trades[closed_trades["FifoPnlRealized"] == 0]
-        
-        num_wins = len(wins)
-        num_losses = len(losses)
-        num_breakeven = len(breakeven)
-        
+        # One pass of sign masks on the raw array - no wins/losses sub-frames
+        closed_pnl = closed_trades["FifoPnlRealized"].to_numpy()
+        win_mask = closed_pnl > 0
+        loss_mask = closed_pnl < 0
+        wins_arr = closed_pnl[win_mask]
+        losses_arr = closed_pnl[loss_mask]
+
+        num_wins = int(win_mask.sum())
+        num_losses = int(loss_mask.sum())
+        num_breakeven = total_trades - num_wins - num_losses
+
         win_rate = (num_wins / total_trades * 100)
-        
-        avg_win = wins["FifoPnlRealized"].mean() if len(wins) > 0 else 0
-        avg_loss = losses["FifoPnlRealized"].mean() if len(losses) > 0 else 0
-        
-        largest_win = wins["FifoPnlRealized"].max() if len(wins) > 0 else 0
-        largest_loss = losses["FifoPnlRealized"].min() if len(losses) > 0 else 0
-        
+
+        avg_win = wins_arr.mean(dtype=np.float64) if num_wins > 0 else 0
+        avg_loss = losses_arr.mean(dtype=np.float64) if num_losses > 0 else 0
+
+        largest_win = wins_arr.max() if num_wins > 0 else 0
+        largest_loss = losses_arr.min() if num_losses > 0 else 0
+
         # Profit Factor
-        gross_profit = wins["FifoPnlRealized"].sum() if len(wins) > 0 else 0
-        gross_loss = abs(losses["FifoPnlRealized"].sum()) if len(losses) > 0 else 0
+        gross_profit = wins_arr.sum(dtype=np.float64) if num_wins > 0 else 0
+        gross_loss = abs(losses_arr.sum(dtype=np.float64)) if num_losses > 0 else 0
         profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else np.inf
-        
+
         # Risk/Reward
         avg_rr_ratio = (abs(avg_win) / abs(avg_loss)) if avg_loss != 0 else 0
-        
+
         # Expectancy
         expectancy = (win_rate/100 * avg_win) + ((1 - win_rate/100) * avg_loss)
-        
+
     else:
         # Defaults if no closed trades
-        wins, losses = pd.DataFrame(), pd.DataFrame()
+        wins_arr = losses_arr = np.array([])
         num_wins, num_losses, num_breakeven = 0, 0, 0
         win_rate, avg_win, avg_loss = 0, 0, 0
         largest_win, largest_loss = 0, 0
@@ -122,141 +182,162 @@ def analyze_trades(df):
     # ==============================================================================
     # 5. STREAKS
     # ==============================================================================
-    max_win_streak = 0
-    max_loss_streak = 0
-    
-    if len(closed_trades) > 0:
-        closed_trades['IsWin'] = closed_trades['FifoPnlRealized'] > 0
-        # Calculate streaks using vectorization
-        streak_groups = closed_trades['IsWin'].ne(closed_trades['IsWin'].shift()).cumsum()
-        streaks = closed_trades.groupby(streak_groups)['IsWin'].agg(['first', 'size'])
-        
-        win_streaks = streaks[streaks['first'] == True]['size']
-        loss_streaks = streaks[streaks['first'] == False]['size']
-        
-        max_win_streak = win_streaks.max() if not win_streaks.empty else 0
-        max_loss_streak = loss_streaks.max() if not loss_streaks.empty else 0
+    # Wins vs losses in date order - run-length encode the sign of the P/L
+    max_win_streak, max_loss_streak = _max_streaks(
+        closed_trades['FifoPnlRealized'].to_numpy() > 0
+    )
     
     # ==============================================================================
     # 6. PER SYMBOL PERFORMANCE
     # ==============================================================================
-    # We aggregate the FULL dataframe to ensure we catch commissions for symbols 
+    # We aggregate the FULL dataframe to ensure we catch commissions for symbols
     # that might have been bought but not sold yet.
+    # Two groupbys total (one on df, one on closed_trades) so the symbol hash
+    # table is built once per frame instead of once per statistic.
+    # Count realized events via a precomputed flag + builtin 'sum' so every
+    # aggregation runs in the fast Cython path (a lambda would fall back to
+    # per-group Python calls)
     symbol_stats = (
-        df.groupby("Symbol")
+        df.assign(_realized=mask_closed.astype(np.int32))
+        .groupby("Symbol", sort=False, observed=True)
         .agg(
-            Trades=("FifoPnlRealized", lambda x: (x != 0).sum()), # Count realized events
+            Trades=("_realized", "sum"),  # Count realized events
             NetPnL=("FifoPnlRealized", "sum"),  # FifoPnlRealized is already net
             Fees=("IBCommission", "sum"),  # For information only
+            OpenPosition=("Quantity", "sum"),  # > 0 means position is still open
         )
     )
-    
-    # Calculate Wins/Losses (requires filtering for closed trades per symbol)
+
+    # Wins/Losses/Best/Worst per symbol in a single pass over closed trades
     if len(closed_trades) > 0:
-        sym_wins = closed_trades[closed_trades['FifoPnlRealized'] > 0].groupby('Symbol').size()
-        sym_losses = closed_trades[closed_trades['FifoPnlRealized'] < 0].groupby('Symbol').size()
-        
-        symbol_stats['Wins'] = symbol_stats.index.map(sym_wins).fillna(0)
-        symbol_stats['Losses'] = symbol_stats.index.map(sym_losses).fillna(0)
+        # The win/loss flags from section 4 ride along for this one groupby
+        closed_agg = (
+            closed_trades.assign(_is_win=win_mask, _is_loss=loss_mask)
+            .groupby('Symbol', sort=False, observed=True)
+            .agg(
+                Wins=('_is_win', 'sum'),
+                Losses=('_is_loss', 'sum'),
+                BestTrade=('FifoPnlRealized', 'max'),
+                WorstTrade=('FifoPnlRealized', 'min'),
+            )
+        )
+        symbol_stats = symbol_stats.join(closed_agg)
+        symbol_stats[['Wins', 'Losses']] = symbol_stats[['Wins', 'Losses']].fillna(0)
     else:
         symbol_stats['Wins'] = 0
         symbol_stats['Losses'] = 0
-        
-    # Calculate Win Rate
-    symbol_stats['WinRate'] = (symbol_stats['Wins'] / symbol_stats['Trades'] * 100).fillna(0)
-    
-    # Add Best/Worst trade per symbol
-    if len(closed_trades) > 0:
-        symbol_stats['BestTrade'] = closed_trades.groupby('Symbol')['FifoPnlRealized'].max()
-        symbol_stats['WorstTrade'] = closed_trades.groupby('Symbol')['FifoPnlRealized'].min()
-    else:
         symbol_stats['BestTrade'] = 0
         symbol_stats['WorstTrade'] = 0
 
-    # Mark symbols with open positions (Quantity sum > 0 means position is still open)
-    position_check = df.groupby('Symbol')['Quantity'].sum()
-    symbol_stats['OpenPosition'] = symbol_stats.index.map(position_check).fillna(0)
+    # Calculate Win Rate (guarded divide - no NaN intermediate to fill)
+    wins_f = symbol_stats['Wins'].to_numpy(dtype=np.float64)
+    trades_f = symbol_stats['Trades'].to_numpy(dtype=np.float64)
+    win_rate_f = np.zeros_like(wins_f)
+    np.divide(wins_f, trades_f, out=win_rate_f, where=trades_f > 0)
+    symbol_stats['WinRate'] = win_rate_f * 100
+
+    # Mark symbols with open positions
     symbol_stats['HasOpenPosition'] = symbol_stats['OpenPosition'] > 0
     
-    # Calculate average P/L per trade
-    symbol_stats['AvgPnL'] = (symbol_stats['NetPnL'] / symbol_stats['Trades']).fillna(0)
+    # Calculate average P/L per trade (same guarded-divide idiom)
+    avg_pnl_f = np.zeros_like(trades_f)
+    np.divide(symbol_stats['NetPnL'].to_numpy(dtype=np.float64), trades_f,
+              out=avg_pnl_f, where=trades_f > 0)
+    symbol_stats['AvgPnL'] = avg_pnl_f
     
     symbol_stats = symbol_stats.sort_values("NetPnL", ascending=False).reset_index()
     
     # ==============================================================================
     # 7. TIME-BASED ANALYSIS (Restored)
     # ==============================================================================
-    closed_trades['DayOfWeek'] = closed_trades['TradeDate'].dt.day_name()
-    closed_trades['Month'] = closed_trades['TradeDate'].dt.to_period('M')
-    
+    # Derive both grouping keys from the datetime64 buffer with integer
+    # arithmetic - no per-row day-name strings or PeriodIndex objects. Only
+    # the few-row result indexes get converted to labels.
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    closed_days = closed_trades['TradeDate'].to_numpy().astype('datetime64[D]')
+    weekdays = (closed_days.astype(np.int64) + 3) % 7  # epoch day 0 was a Thursday
+    month_keys = closed_days.astype('datetime64[M]')
+
     # Day of week performance
+    # Up-cast the float32 aggregates to float64 before rounding so the
+    # displayed tables show clean 2-decimal values, not float32 noise
     dow_performance = (
-        closed_trades.groupby('DayOfWeek')['FifoPnlRealized']
+        closed_trades.groupby(weekdays)['FifoPnlRealized']
         .agg(['sum', 'mean', 'count'])
+        .astype({'sum': np.float64, 'mean': np.float64})
         .round(2)
     )
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    dow_performance = dow_performance.reindex([d for d in day_order if d in dow_performance.index])
-    
+    dow_performance.index = pd.Index(
+        [day_order[i] for i in dow_performance.index], name='DayOfWeek'
+    )
+
     # Monthly performance
     monthly_performance = (
-        closed_trades.groupby('Month')['FifoPnlRealized']
+        closed_trades.groupby(month_keys, sort=False)['FifoPnlRealized']
         .agg(['sum', 'count'])
+        .astype({'sum': np.float64})
         .round(2)
     )
-    monthly_performance.index = monthly_performance.index.astype(str)
+    monthly_performance.index = pd.Index(
+        monthly_performance.index.to_numpy().astype('datetime64[M]').astype(str),
+        name='Month',
+    )
     
     # ==============================================================================
     # 8. FEAR INDEX & GRADING (Restored)
     # ==============================================================================
-    if len(wins) > 0 and avg_win > 0:
+    if num_wins > 0 and avg_win > 0:
         small_win_threshold = avg_win * 0.3
-        small_wins = wins[wins["FifoPnlRealized"] < small_win_threshold]
-        fear_index = (len(small_wins) / len(wins)) * 100
+        fear_index = (wins_arr < small_win_threshold).mean() * 100
     else:
         fear_index = 0
     
-    # Grading Logic
-    def grade_trade(pnl, fee):
-        net = pnl + fee 
-        fee_cost = abs(fee) if fee != 0 else 0.01 # avoid div by zero
-        
-        if net > 5 * fee_cost: return "A+"
-        elif net > 3 * fee_cost: return "A"
-        elif net > fee_cost: return "B"
-        elif net > 0: return "C"
-        elif net > -fee_cost: return "D"
-        else: return "F"
-    
-    closed_trades["Grade"] = closed_trades.apply(
-        lambda x: grade_trade(x["FifoPnlRealized"], x["IBCommission"]), axis=1
+    # Grading Logic (vectorized - one NumPy pass instead of a Python call per row)
+    grade_order = ["A+", "A", "B", "C", "D", "F"]
+    pnl_arr = closed_trades["FifoPnlRealized"].to_numpy()
+    fee_arr = closed_trades["IBCommission"].to_numpy()
+    net = pnl_arr + fee_arr
+    fee_cost = np.where(fee_arr != 0, np.abs(fee_arr), 0.01)  # avoid div by zero
+
+    conditions = [
+        net > 5 * fee_cost,
+        net > 3 * fee_cost,
+        net > fee_cost,
+        net > 0,
+        net > -fee_cost,
+    ]
+    choices = ["A+", "A", "B", "C", "D"]
+
+    grades = np.select(conditions, choices, default="F")
+    closed_trades = closed_trades.assign(
+        Grade=pd.Categorical(grades, categories=grade_order)
     )
-    grade_dist = closed_trades["Grade"].value_counts().to_dict()
+    # Count occurring grades straight off the ndarray - no Series round-trip
+    labels, counts = np.unique(grades, return_counts=True)
+    grade_dist = dict(zip(labels.tolist(), counts.tolist()))
     
     # ==============================================================================
     # 9. INSIGHTS GENERATION (Restored)
     # ==============================================================================
-    insights = []
-    
-    if win_rate < 40: insights.append("⚠️ Low win rate (<40%). Consider improving trade selection.")
-    elif win_rate > 70: insights.append("✅ High win rate (>70%). Good trade selection!")
-    
-    if avg_win > 0 and avg_loss < 0:
-        if avg_rr_ratio < 1.5: insights.append("⚠️ Risk/Reward ratio below 1.5:1. Losses are too large relative to wins.")
-        elif avg_rr_ratio > 2.5: insights.append("✅ Excellent Risk/Reward ratio (>2.5:1)!")
-    
-    if profit_factor < 1: insights.append("🚨 Profit factor <1. Overall unprofitable.")
-    elif profit_factor > 2: insights.append("✅ Strong profit factor (>2)!")
-    
-    if fear_index > 50: insights.append("🧠 High Fear Index (>50%). You are cutting winners too early.")
-    
-    if commission_pct > 30: insights.append("💸 Commissions eating >30% of gross profits. Reduce frequency or increase size.")
-    
-    if max_loss_streak >= 5: insights.append(f"⚠️ Long losing streak ({max_loss_streak} trades).")
-    
-    if expectancy > 0: insights.append(f"✅ Positive expectancy (${expectancy:.2f} per trade).")
-    else: insights.append(f"🚨 Negative expectancy (${expectancy:.2f} per trade).")
-    
+    # Table-driven: each rule is (condition, message), evaluated once.
+    # The paired thresholds (low/high win rate etc.) are mutually exclusive,
+    # so a flat table preserves the old if/elif output exactly.
+    has_rr = avg_win > 0 and avg_loss < 0
+    rules = [
+        (win_rate < 40, "⚠️ Low win rate (<40%). Consider improving trade selection."),
+        (win_rate > 70, "✅ High win rate (>70%). Good trade selection!"),
+        (has_rr and avg_rr_ratio < 1.5, "⚠️ Risk/Reward ratio below 1.5:1. Losses are too large relative to wins."),
+        (has_rr and avg_rr_ratio > 2.5, "✅ Excellent Risk/Reward ratio (>2.5:1)!"),
+        (profit_factor < 1, "🚨 Profit factor <1. Overall unprofitable."),
+        (profit_factor > 2, "✅ Strong profit factor (>2)!"),
+        (fear_index > 50, "🧠 High Fear Index (>50%). You are cutting winners too early."),
+        (commission_pct > 30, "💸 Commissions eating >30% of gross profits. Reduce frequency or increase size."),
+        (max_loss_streak >= 5, f"⚠️ Long losing streak ({max_loss_streak} trades)."),
+        (expectancy > 0, f"✅ Positive expectancy (${expectancy:.2f} per trade)."),
+        (expectancy <= 0, f"🚨 Negative expectancy (${expectancy:.2f} per trade)."),
+    ]
+    insights = [msg for cond, msg in rules if cond]
+
     if len(dow_performance) > 0:
         best_day = dow_performance['sum'].idxmax()
         insights.append(f"📅 Best day: {best_day}")
@@ -264,8 +345,18 @@ def analyze_trades(df):
     # ==============================================================================
     # 10. FINAL RETURN
     # ==============================================================================
-    top_winners = closed_trades.nlargest(5, 'FifoPnlRealized')[['TradeDate', 'Symbol', 'FifoPnlRealized', 'IBCommission']]
-    top_losers = closed_trades.nsmallest(5, 'FifoPnlRealized')[['TradeDate', 'Symbol', 'FifoPnlRealized', 'IBCommission']]
+    # Top/bottom 5 via argpartition (O(N) selection, then sort only 5 rows)
+    trade_cols = ['TradeDate', 'Symbol', 'FifoPnlRealized', 'IBCommission']
+    pnl_closed = closed_trades['FifoPnlRealized'].to_numpy()
+    k = min(5, len(pnl_closed))
+    if k > 0:
+        top_idx = np.argpartition(-pnl_closed, k - 1)[:k]
+        bot_idx = np.argpartition(pnl_closed, k - 1)[:k]
+        top_winners = closed_trades.iloc[top_idx][trade_cols].sort_values('FifoPnlRealized', ascending=False)
+        top_losers = closed_trades.iloc[bot_idx][trade_cols].sort_values('FifoPnlRealized')
+    else:
+        top_winners = closed_trades.iloc[[]][trade_cols]
+        top_losers = closed_trades.iloc[[]][trade_cols]
 
     return {
         "total_trades": total_trades,
@@ -315,76 +406,222 @@ def analyze_trades(df):
     }
 
 
+# Memoize analyze_trades: interactive callers (the Streamlit UI) re-run the
+# same filter combinations constantly, so a handful of cached results turns
+# repeat calls into dict lookups.
+_analyze_cache = OrderedDict()
+_ANALYZE_CACHE_SIZE = 8
+
+
+def _fingerprint(df):
+    """Content fingerprint of a trade log. None disables caching.
+
+    Hashes every column the analysis reads (vectorized row hashes digested
+    through sha1), so frames that differ only in commissions, quantities or
+    symbols can't collide the way a (length, P/L-sum, date-range) key could.
+    """
+    try:
+        cols = [c for c in ("TradeDate", "FifoPnlRealized", "IBCommission",
+                            "Quantity", "Symbol", "Buy/Sell") if c in df.columns]
+        if not cols:
+            return None
+        row_hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+        return (len(df), hashlib.sha1(row_hashes.tobytes()).hexdigest())
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def analyze_trades(df):
+    """Memoized wrapper around the full analysis - same input, cached output.
+
+    Hits return a shallow copy, so replacing a value in the result dict is
+    safe; the contained frames/series are still shared and must be treated
+    as read-only.
+    """
+    key = _fingerprint(df)
+    if key is None:
+        return _analyze_trades(df)
+    cached = _analyze_cache.get(key)
+    if cached is not None:
+        _analyze_cache.move_to_end(key)
+        return dict(cached)
+    result = _analyze_trades(df)
+    _analyze_cache[key] = result
+    if len(_analyze_cache) > _ANALYZE_CACHE_SIZE:
+        _analyze_cache.popitem(last=False)
+    return result
+
+
+# ==============================================================================
+# YAHOO FINANCE CACHE
+# ==============================================================================
+# Sector/industry almost never change, so cache them on disk for a day.
+# Prices get a short TTL so repeated calls within a session skip the network.
+_YF_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".yf_cache.json")
+_SECTOR_TTL = 24 * 3600  # seconds
+_PRICE_TTL = 60  # seconds
+
+_yf_cache = None
+_yf_cache_lock = threading.Lock()
+
+_yf_executor = None
+
+
+def _get_executor():
+    """Shared thread pool for ticker lookups, created once and reused.
+
+    Spinning up (and tearing down) 10 worker threads per holdings refresh
+    costs more than the lookups themselves once the cache is warm.
+    """
+    global _yf_executor
+    if _yf_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _yf_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="yf")
+    return _yf_executor
+
+
+def _cache_get(kind, symbol, ttl):
+    global _yf_cache
+    with _yf_cache_lock:
+        if _yf_cache is None:
+            try:
+                with open(_YF_CACHE_PATH) as f:
+                    _yf_cache = json.load(f)
+            except (OSError, ValueError):
+                _yf_cache = {}
+        entry = _yf_cache.get(f"{kind}:{symbol}")
+    if entry and time.time() - entry["ts"] < ttl:
+        return entry["value"]
+    return None
+
+
+def _cache_set(kind, symbol, value):
+    with _yf_cache_lock:
+        _yf_cache[f"{kind}:{symbol}"] = {"ts": time.time(), "value": value}
+        try:
+            with open(_YF_CACHE_PATH, "w") as f:
+                json.dump(_yf_cache, f)
+        except OSError:
+            pass  # cache is best-effort only
+
+
+def _get_ticker_profile(symbol):
+    """Sector/industry for a symbol, cached on disk (they rarely change)."""
+    cached = _cache_get("profile", symbol, _SECTOR_TTL)
+    if cached is not None:
+        return cached
+    import yfinance as yf
+    try:
+        info = yf.Ticker(symbol).info
+        profile = {
+            "sector": info.get("sector", info.get("category", "Unknown")),
+            "industry": info.get("industry", "Unknown"),
+        }
+    except Exception:
+        # Don't cache failures - retry on the next call
+        return {"sector": "Unknown", "industry": "Unknown"}
+    _cache_set("profile", symbol, profile)
+    return profile
+
+
+def _get_live_prices(symbols):
+    """Latest prices for many symbols in one batched request.
+
+    Cache hits skip the network; all misses go out as a single
+    yf.download call instead of one HTTP round-trip per symbol.
+    Symbols that could not be priced are absent from the result.
+    """
+    prices = {}
+    misses = []
+    for symbol in symbols:
+        cached = _cache_get("price", symbol, _PRICE_TTL)
+        if cached is not None:
+            prices[symbol] = cached
+        else:
+            misses.append(symbol)
+
+    if misses:
+        import yfinance as yf
+        try:
+            close = yf.download(misses, period="1d", progress=False)["Close"]
+            if isinstance(close, pd.DataFrame):
+                last = close.iloc[-1]
+            else:  # a single symbol comes back as a Series
+                last = pd.Series({misses[0]: close.iloc[-1]})
+            for symbol, price in last.items():
+                if pd.notna(price):
+                    prices[symbol] = float(price)
+                    _cache_set("price", symbol, float(price))
+        except Exception:
+            pass  # callers fall back to the last trade price
+
+    return prices
+
+
 def analyze_current_holdings(df):
     """
     Analyze current holdings (open positions) with sector information.
     Returns holdings with sector breakdown and allocation percentages.
-    
+
     NOTE: Queries unique tickers only (grouped by Symbol first).
-    Uses batch fetching and threading for speed.
+    Uses batch fetching, threading, and an on-disk cache for speed.
     """
-    import yfinance as yf
-    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from concurrent.futures import as_completed
     
-    # Calculate average cost basis for each symbol using FIFO
+    # Calculate average cost basis for each symbol using FIFO (vectorized)
     def calculate_avg_cost(symbol_df):
         # Sort by date to process in order
-        symbol_df = symbol_df.sort_values('TradeDate').reset_index(drop=True)
-        
-        # Track lots (FIFO queue)
-        lots = []  # Each lot: {'quantity': qty, 'price': price}
-        
-        for _, row in symbol_df.iterrows():
-            qty = row['Quantity']
-            price = row['TradePrice']
-            
-            if qty > 0:  # BUY - add new lot
-                # Include commission in cost basis
-                commission_per_share = abs(row['IBCommission']) / qty
-                price_with_commission = price + commission_per_share
-                lots.append({'quantity': qty, 'price': price_with_commission})
-            
-            else:  # SELL - remove from oldest lots (FIFO)
-                sell_qty = abs(qty)
-                remaining_to_sell = sell_qty
-                
-                while remaining_to_sell > 0 and len(lots) > 0:
-                    if lots[0]['quantity'] <= remaining_to_sell:
-                        # Sell entire oldest lot
-                        remaining_to_sell -= lots[0]['quantity']
-                        lots.pop(0)
-                    else:
-                        # Partially sell oldest lot
-                        lots[0]['quantity'] -= remaining_to_sell
-                        remaining_to_sell = 0
-        
-        # Calculate weighted average of remaining lots
-        if len(lots) == 0:
+        symbol_df = symbol_df.sort_values('TradeDate')
+
+        qty = symbol_df['Quantity'].to_numpy(dtype=np.float64)
+        price = symbol_df['TradePrice'].to_numpy(dtype=np.float64)
+        comm = np.abs(symbol_df['IBCommission'].to_numpy(dtype=np.float64))
+
+        # Buy lots in FIFO order; commission is baked into the cost per share
+        buy_mask = qty > 0
+        buy_qty = qty[buy_mask]
+        if buy_qty.size == 0:
             return 0
-        
-        total_cost = sum(lot['quantity'] * lot['price'] for lot in lots)
-        total_shares = sum(lot['quantity'] for lot in lots)
-        
-        return total_cost / total_shares if total_shares > 0 else 0
-    
-    # Calculate position for each symbol (this gives us UNIQUE symbols only)
-    position_data = []
-    for symbol in df['Symbol'].unique():
-        symbol_df = df[df['Symbol'] == symbol]
-        
-        position_data.append({
-            'Symbol': symbol,
-            'Quantity': symbol_df['Quantity'].sum(),
-            'AvgCostBasis': calculate_avg_cost(symbol_df),
-            'LastTradePrice': symbol_df['TradePrice'].iloc[-1],
-            'TradeDate': symbol_df['TradeDate'].iloc[-1]
-        })
-    
-    position_summary = pd.DataFrame(position_data)
+        buy_cost = price[buy_mask] + comm[buy_mask] / buy_qty
+
+        # Sells consume the oldest lots first: everything up to total_sold
+        # shares of cumulative buy volume is gone, the rest survives.
+        # A sell with no inventory to match is discarded (it never consumes
+        # later buys), so clip total_sold by the worst running inventory.
+        total_sold = -qty[qty < 0].sum()
+        running_inventory = np.cumsum(qty)
+        total_sold += min(0.0, running_inventory.min())
+        cum_buy = np.cumsum(buy_qty)
+        if total_sold >= cum_buy[-1]:
+            return 0
+
+        # Lots fully consumed are those whose cumulative volume <= total_sold
+        k = np.searchsorted(cum_buy, total_sold, side='right')
+        surviving_qty = buy_qty[k:].copy()
+        consumed_from_first = total_sold - (cum_buy[k - 1] if k > 0 else 0)
+        surviving_qty[0] -= consumed_from_first
+
+        total_shares = surviving_qty.sum()
+        if total_shares <= 0:
+            return 0
+        return np.dot(surviving_qty, buy_cost[k:]) / total_shares
     
+    # Calculate position for each symbol in one groupby pass (instead of
+    # rescanning the whole frame once per symbol)
+    sorted_df = df.sort_values('TradeDate')
+    position_summary = (
+        sorted_df.groupby('Symbol', sort=False)
+        .agg(
+            Quantity=('Quantity', 'sum'),
+            LastTradePrice=('TradePrice', 'last'),
+            TradeDate=('TradeDate', 'last'),
+        )
+        .reset_index()
+    )
+
     # Filter for open positions only (Quantity > 0)
     open_positions = position_summary[position_summary['Quantity'] > 0].copy()
-    
+
     if len(open_positions) == 0:
         return {
             'holdings': pd.DataFrame(),
@@ -392,72 +629,52 @@ def analyze_current_holdings(df):
             'total_market_value': 0,
             'sector_summary': {}
         }
+
+    # FIFO cost basis is only needed for symbols still holding shares
+    open_symbols = set(open_positions['Symbol'])
+    avg_costs = {
+        symbol: calculate_avg_cost(group)
+        for symbol, group in sorted_df.groupby('Symbol', sort=False)
+        if symbol in open_symbols
+    }
+    open_positions['AvgCostBasis'] = open_positions['Symbol'].map(avg_costs)
     
-    # Fetch ticker data in parallel (MUCH FASTER!)
+    # One batched request covers the prices for every open position
+    prices = _get_live_prices(open_positions['Symbol'].tolist())
+
+    # Fetch ticker data in parallel (only the sector lookup hits the network)
     def fetch_ticker_data(symbol_data):
         symbol = symbol_data['symbol']
         quantity = symbol_data['quantity']
         avg_cost = symbol_data['avg_cost']
         last_price = symbol_data['last_price']
         last_date = symbol_data['last_date']
-        
-        try:
-            ticker = yf.Ticker(symbol)
-            
-            # Get current price (fast)
-            try:
-                current_price = ticker.fast_info['lastPrice']
-            except:
-                current_price = last_price
-            
-            # Get sector/industry (slower, but necessary)
-            try:
-                info = ticker.info
-                sector = info.get('sector', info.get('category', 'Unknown'))
-                industry = info.get('industry', 'Unknown')
-            except:
-                sector = 'Unknown'
-                industry = 'Unknown'
-            
-            # Calculate P/L
-            cost_basis = quantity * avg_cost
-            market_value = quantity * current_price
-            unrealized_pnl = market_value - cost_basis
-            unrealized_pnl_pct = (unrealized_pnl / cost_basis * 100) if cost_basis > 0 else 0
-            
-            return {
-                'Symbol': symbol,
-                'Quantity': quantity,
-                'Avg Cost': avg_cost,
-                'Current Price': current_price,
-                'Cost Basis': cost_basis,
-                'Market Value': market_value,
-                'Unrealized P/L': unrealized_pnl,
-                'Unrealized P/L %': unrealized_pnl_pct,
-                'Sector': sector,
-                'Industry': industry,
-                'Last Trade Date': last_date
-            }
-        except Exception as e:
-            # Fallback to last known price
-            cost_basis = quantity * avg_cost
-            market_value = quantity * last_price
-            unrealized_pnl = market_value - cost_basis
-            unrealized_pnl_pct = (unrealized_pnl / cost_basis * 100) if cost_basis > 0 else 0
-            
-            return {
-                'Symbol': symbol,
-                'Quantity': quantity,
-                'Avg Cost': avg_cost,
-                'Current Price': last_price,
-                'Cost Basis': cost_basis,
-                'Market Value': market_value,
-                'Unrealized P/L': unrealized_pnl,
-                'Unrealized P/L %': unrealized_pnl_pct,
-                'Sector': 'Unknown',
-                'Industry': 'Unknown',
-                'Last Trade Date': last_date
-            }
+
+        # Current price from the batch fetch, falling back to last trade price
+        current_price = prices.get(symbol, last_price)
+
+        # Get sector/industry (slower, but cached for 24h)
+        profile = _get_ticker_profile(symbol)
+
+        # Calculate P/L
+        cost_basis = quantity * avg_cost
+        market_value = quantity * current_price
+        unrealized_pnl = market_value - cost_basis
+        unrealized_pnl_pct = (unrealized_pnl / cost_basis * 100) if cost_basis > 0 else 0
+
+        return {
+            'Symbol': symbol,
+            'Quantity': quantity,
+            'Avg Cost': avg_cost,
+            'Current Price': current_price,
+            'Cost Basis': cost_basis,
+            'Market Value': market_value,
+            'Unrealized P/L': unrealized_pnl,
+            'Unrealized P/L %': unrealized_pnl_pct,
+            'Sector': profile['sector'],
+            'Industry': profile['industry'],
+            'Last Trade Date': last_date
+        }
     
     # Prepare data for parallel fetching
     symbols_to_fetch = [
@@ -473,10 +690,10 @@ def analyze_current_holdings(df):
     
     # Fetch all tickers in parallel
     holdings_data = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(fetch_ticker_data, data) for data in symbols_to_fetch]
-        for future in as_completed(futures):
-            holdings_data.append(future.result())
+    executor = _get_executor()
+    futures = [executor.submit(fetch_ticker_data, data) for data in symbols_to_fetch]
+    for future in as_completed(futures):
+        holdings_data.append(future.result())
     
     # Create holdings dataframe
     holdings_df = pd.DataFrame(holdings_data)
@@ -498,23 +715,26 @@ def analyze_current_holdings(df):
     # Sort by market value
     holdings_df = holdings_df.sort_values('Market Value', ascending=False)
     
-    # Calculate sector allocation
-    sector_allocation = holdings_df.groupby('Sector').agg({
+    # Calculate sector allocation (few distinct sectors - categorical codes
+    # and an unsorted groupby, since we order by market value afterwards)
+    holdings_df['Sector'] = holdings_df['Sector'].astype('category')
+    sector_allocation = holdings_df.groupby('Sector', sort=False, observed=True).agg({
         'Market Value': 'sum',
         'Symbol': 'count'
     }).reset_index()
     sector_allocation.columns = ['Sector', 'Market Value', 'Number of Stocks']
     sector_allocation['% of Portfolio'] = (sector_allocation['Market Value'] / total_market_value * 100).round(2)
     sector_allocation = sector_allocation.sort_values('Market Value', ascending=False)
-    
-    # Create sector summary dictionary
-    sector_summary = {}
-    for _, row in sector_allocation.iterrows():
-        sector_summary[row['Sector']] = {
-            'value': row['Market Value'],
-            'percentage': row['% of Portfolio'],
-            'count': int(row['Number of Stocks'])
+
+    # Create sector summary dictionary (one C-level to_dict, no row loop)
+    sector_summary = {
+        sector: {
+            'value': vals['Market Value'],
+            'percentage': vals['% of Portfolio'],
+            'count': int(vals['Number of Stocks'])
         }
+        for sector, vals in sector_allocation.set_index('Sector').to_dict(orient='index').items()
+    }
     
     return {
         'holdings': holdings_df,
@@ -524,15 +744,41 @@ def analyze_current_holdings(df):
     }
 
 
+@functools.lru_cache(maxsize=128)
+def _to_ts(value):
+    return pd.to_datetime(value)
+
+
 def filter_trades_by_date(df, start_date=None, end_date=None):
-    df['TradeDate'] = pd.to_datetime(df['TradeDate'])
+    # Only re-parse when the column isn't datetime yet (it usually is,
+    # because this runs on every filter interaction in the UI)
+    if not pd.api.types.is_datetime64_any_dtype(df['TradeDate']):
+        df = df.assign(TradeDate=pd.to_datetime(df['TradeDate']))
+    if start_date is None and end_date is None:
+        return df
+
+    dates = df['TradeDate'].to_numpy()
+
+    # Already date-sorted (the common case after analysis): binary-search the
+    # bounds and slice instead of scanning the whole column
+    if len(dates) > 0 and df['TradeDate'].is_monotonic_increasing:
+        lo = np.searchsorted(dates, _to_ts(start_date).to_datetime64(), side='left') if start_date else 0
+        hi = np.searchsorted(dates, _to_ts(end_date).to_datetime64(), side='right') if end_date else len(dates)
+        return df.iloc[lo:hi]
+
+    mask = np.ones(len(df), dtype=bool)
     if start_date:
-        df = df[df['TradeDate'] >= pd.to_datetime(start_date)]
+        mask &= dates >= _to_ts(start_date).to_datetime64()
     if end_date:
-        df = df[df['TradeDate'] <= pd.to_datetime(end_date)]
-    return df
+        mask &= dates <= _to_ts(end_date).to_datetime64()
+    return df[mask]
 
 def filter_trades_by_symbol(df, symbols):
-    if symbols:
-        return df[df['Symbol'].isin(symbols)]
-    return df
\ No newline at end of file
+    if not symbols:
+        return df
+    if isinstance(df['Symbol'].dtype, pd.CategoricalDtype):
+        # Match on the int category codes - no string hashing per row
+        wanted = df['Symbol'].cat.categories.get_indexer(pd.Index(symbols))
+        mask = np.isin(df['Symbol'].cat.codes.to_numpy(), wanted[wanted >= 0])
+        return df[mask]
+    return df[df['Symbol'].isin(symbols)]
\ No newline at end of file
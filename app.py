@@ -1,5 +1,9 @@
+import io
+import os
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
@@ -8,21 +12,212 @@ from datetime import datetime, timedelta
 
 st.set_page_config(page_title="Trade Analyzer Pro", layout="wide", page_icon="📊")
 
-# Custom CSS for better styling (Preserved)
-st.markdown("""
-<style>
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 20px;
-        border-radius: 10px;
-        margin: 10px 0;
-    }
-    .positive { color: #00cc00; }
-    .negative { color: #ff3333; }
-    .stTabs [data-baseweb="tab-list"] { gap: 24px; }
-    .stTabs [data-baseweb="tab"] { padding: 10px 20px; }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS lives in .streamlit/style.css; the cached read means the file
+# is hit once per session rather than on every rerun
+@st.cache_data(show_spinner=False)
+def load_css() -> str:
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.streamlit', 'style.css')
+    with open(path) as f:
+        return f"<style>{f.read()}</style>"
+
+
+st.markdown(load_css(), unsafe_allow_html=True)
+
+def lttb_indices(y: np.ndarray, n_out: int = 2000) -> np.ndarray:
+    """Largest-triangle-three-buckets downsampling; returns the kept indices.
+
+    Keeps the visually significant points (peaks/troughs) so a multi-year
+    curve renders with ~n_out points instead of the full series.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64)
+    y = y.astype(np.float64, copy=False)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo = edges[i]
+        hi = max(edges[i + 1], lo + 1)
+        nxt_lo = hi
+        nxt_hi = max(edges[i + 2] if i + 2 < n_out - 1 else n, nxt_lo + 1)
+        # the next bucket's centroid is the third triangle vertex
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+@st.cache_data(show_spinner=False)
+def load_csv(file_bytes: bytes) -> pd.DataFrame:
+    """Parse the uploaded CSV once per file; Streamlit reruns reuse the cached frame."""
+    try:
+        # pyarrow's multithreaded parser is several times faster on big exports
+        df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow')
+    except (ImportError, ValueError):
+        df = pd.read_csv(io.BytesIO(file_bytes))
+    if 'TradeDate' in df.columns:
+        df['TradeDate'] = pd.to_datetime(df['TradeDate'], errors='coerce')
+    if 'Symbol' in df.columns:
+        # Integer category codes instead of python strings for every
+        # downstream isin/groupby; the sorted categories double as the
+        # symbol list for the sidebar
+        df['Symbol'] = df['Symbol'].astype('category')
+    return df
+
+
+def filtered_frame(file_bytes: bytes, start, end, symbols: tuple) -> pd.DataFrame:
+    """Rebuild the filtered frame from the cached CSV for a given filter set."""
+    df = load_csv(file_bytes)
+    if start is not None and end is not None:
+        df = filter_trades_by_date(df, start, end)
+    if symbols:
+        df = filter_trades_by_symbol(df, list(symbols))
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def run_analysis(file_bytes: bytes, start, end, symbols: tuple):
+    """Memoized analyze_trades keyed on the file and filter inputs, so tab
+    switches and other non-filter interactions skip the recomputation."""
+    return analyze_trades(filtered_frame(file_bytes, start, end, symbols))
+
+
+@st.cache_data(show_spinner=False, ttl=300)
+def run_holdings_analysis(file_bytes: bytes, start, end, symbols: tuple):
+    """Memoized analyze_current_holdings - avoids re-hitting yfinance on rerun.
+
+    The 5-minute ttl keeps intraday reruns warm while still letting live
+    prices refresh; without it a session would pin the first quote forever.
+    """
+    return analyze_current_holdings(filtered_frame(file_bytes, start, end, symbols))
+
+
+
+@st.cache_data(show_spinner=False)
+def build_equity_fig(curve_x, curve_eq, curve_dd):
+    """Equity + drawdown subplot, cached on the plotted arrays so reruns
+    that don't change the curves skip rebuilding the figure tree."""
+    fig = make_subplots(
+        rows=2, cols=1,
+        row_heights=[0.7, 0.3],
+        subplot_titles=("Equity Curve (Time-Based)", "Drawdown"),
+        vertical_spacing=0.1,
+        shared_xaxes=True
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=curve_x,
+            y=curve_eq,
+            mode='lines',
+            name='Equity',
+            line=dict(color='#00cc00', width=2),
+            fill='tozeroy',
+            fillcolor='rgba(0, 204, 0, 0.1)'
+        ),
+        row=1, col=1
+    )
+
+    # Drawdown
+    fig.add_trace(
+        go.Scatter(
+            x=curve_x,
+            y=curve_dd,
+            mode='lines',
+            name='Drawdown',
+            line=dict(color='#ff3333', width=2),
+            fill='tozeroy',
+            fillcolor='rgba(255, 51, 51, 0.1)'
+        ),
+        row=2, col=1
+    )
+
+    fig.update_xaxes(title_text="Date", row=2, col=1)
+    fig.update_yaxes(title_text="Cumulative P/L ($)", row=1, col=1)
+    fig.update_yaxes(title_text="Drawdown ($)", row=2, col=1)
+
+    fig.update_layout(
+        height=700,
+        showlegend=True,
+        hovermode='x unified'
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def build_grade_fig(grades: tuple, counts: tuple, colors: tuple):
+    """Grade distribution bars, cached on the small label/count tuples."""
+    fig = go.Figure(data=[
+        go.Bar(
+            x=list(grades),
+            y=np.array(counts, dtype=np.int32),
+            marker_color=list(colors),
+            text=list(counts),
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(
+        xaxis_title='Grade',
+        yaxis_title='Number of Trades',
+        height=400
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def build_fear_gauge(fear_index: float):
+    """Fear-index gauge, cached on the single scalar it displays."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=fear_index,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Fear Index"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 30], 'color': "lightgreen"},
+                {'range': [30, 50], 'color': "yellow"},
+                {'range': [50, 100], 'color': "lightcoral"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 50
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def build_sector_pie(labels, values):
+    """Sector allocation pie, cached on the label/value arrays."""
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=0.4,
+        textinfo='label+percent',
+        hovertemplate='<b>%{label}</b><br>' +
+                        'Value: $%{value:,.2f}<br>' +
+                        'Percentage: %{percent}<br>' +
+                        '<extra></extra>'
+    )])
+    fig.update_layout(
+        showlegend=True,
+        height=500,
+        title="Portfolio by Sector",
+        margin=dict(l=20, r=20, t=40, b=100)  # Add this line! b=bottom padding
+    )
+    return fig
+
 
 st.title("📊 Trading Performance Analyzer Pro")
 st.markdown("Upload your IBKR trade CSV to get comprehensive insights into your trading performance.")
@@ -30,19 +225,19 @@ st.markdown("Upload your IBKR trade CSV to get comprehensive insights into your
 uploaded_file = st.file_uploader("📁 Upload IBKR Trade CSV", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-    
+    file_bytes = uploaded_file.getvalue()
+    df = load_csv(file_bytes)
+
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
-    
-    # Date range filter
-    df_temp = df.copy()
-    df_temp['TradeDate'] = pd.to_datetime(df_temp['TradeDate'], errors='coerce')
-    
+
+    # Date range filter (TradeDate is already parsed by load_csv)
+    trade_dates = df['TradeDate'].dropna()
+
     # Handle potential empty date range
-    if not df_temp['TradeDate'].dropna().empty:
-        min_date = df_temp['TradeDate'].min().date()
-        max_date = df_temp['TradeDate'].max().date()
+    if not trade_dates.empty:
+        min_date = trade_dates.min().date()
+        max_date = trade_dates.max().date()
     else:
         min_date = datetime.now().date()
         max_date = datetime.now().date()
@@ -56,38 +251,47 @@ if uploaded_file:
     
     # Symbol filter
     if 'Symbol' in df.columns:
-        all_symbols = sorted(df['Symbol'].dropna().unique())
-        selected_symbols = st.sidebar.multiselect(
-            "Symbols",
-            options=all_symbols,
-            default=all_symbols
-        )
+        all_symbols = df['Symbol'].cat.categories.tolist()  # already sorted
+        # An "All" checkbox instead of default=all_symbols: no giant widget
+        # state to round-trip each rerun, and no isin scan when unfiltered
+        if st.sidebar.checkbox("All symbols", value=True):
+            selected_symbols = []
+        else:
+            selected_symbols = st.sidebar.multiselect(
+                "Symbols",
+                options=all_symbols,
+                default=[]
+            )
     else:
         selected_symbols = []
     
-    # Apply filters
-    df_filtered = df.copy()
-    if len(date_range) == 2:
-        df_filtered = filter_trades_by_date(df_filtered, date_range[0], date_range[1])
-    if selected_symbols:
-        df_filtered = filter_trades_by_symbol(df_filtered, selected_symbols)
-    
+    # Apply filters - reduced to a hashable cache key; the cached analysis
+    # functions rebuild the filtered frame from the cached CSV on a miss
+    filter_start, filter_end = (date_range[0], date_range[1]) if len(date_range) == 2 else (None, None)
+    if (filter_start, filter_end) == (min_date, max_date):
+        # Full range selected - skip the date filter entirely
+        filter_start, filter_end = None, None
+    symbols_key = tuple(sorted(selected_symbols))
+
     # Analyze trades
-    results = analyze_trades(df_filtered)
+    results = run_analysis(file_bytes, filter_start, filter_end, symbols_key)
     
-    # Create tabs
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📊 Overview", 
-        "📈 Performance", 
-        "🎯 Symbol Analysis", 
+    # View selector instead of st.tabs: Streamlit executes every tab body on
+    # every rerun, so with seven tabs most figure/styling work was wasted.
+    # A radio renders only the selected view (the holdings view in
+    # particular doesn't touch yfinance until it's opened).
+    view = st.sidebar.radio("View", [
+        "📊 Overview",
+        "📈 Performance",
+        "🎯 Symbol Analysis",
         "📅 Time Analysis",
         "🏆 Best/Worst Trades",
         "💼 Holdings Dashboard",
         "📄 Raw Data"
     ])
     
-    # ========== TAB 1: OVERVIEW ==========
-    with tab1:
+    # ========== VIEW 1: OVERVIEW ==========
+    if view == "📊 Overview":
         st.header("Performance Overview")
         
         # Key metrics in columns
@@ -154,58 +358,23 @@ if uploaded_file:
             else:
                 st.warning(insight)
     
-    # ========== TAB 2: PERFORMANCE CHARTS (UPDATED) ==========
-    with tab2:
+    # ========== VIEW 2: PERFORMANCE CHARTS (UPDATED) ==========
+    elif view == "📈 Performance":
         st.header("Performance Analysis")
         
-        # Equity Curve with Drawdown
-        fig = make_subplots(
-            rows=2, cols=1,
-            row_heights=[0.7, 0.3],
-            subplot_titles=("Equity Curve (Time-Based)", "Drawdown"),
-            vertical_spacing=0.1,
-            shared_xaxes=True
-        )
-        
-        # Equity curve (Now using Date Index)
-        fig.add_trace(
-            go.Scatter(
-                x=results['equity_curve'].index,
-                y=results['equity_curve'].values,
-                mode='lines',
-                name='Equity',
-                line=dict(color='#00cc00', width=2),
-                fill='tozeroy',
-                fillcolor='rgba(0, 204, 0, 0.1)'
-            ),
-            row=1, col=1
-        )
-        
-        # Drawdown
-        fig.add_trace(
-            go.Scatter(
-                x=results['drawdown_curve'].index,
-                y=results['drawdown_curve'].values,
-                mode='lines',
-                name='Drawdown',
-                line=dict(color='#ff3333', width=2),
-                fill='tozeroy',
-                fillcolor='rgba(255, 51, 51, 0.1)'
-            ),
-            row=2, col=1
-        )
-        
-        fig.update_xaxes(title_text="Date", row=2, col=1)
-        fig.update_yaxes(title_text="Cumulative P/L ($)", row=1, col=1)
-        fig.update_yaxes(title_text="Drawdown ($)", row=2, col=1)
-        
-        fig.update_layout(
-            height=700,
-            showlegend=True,
-            hovermode='x unified'
-        )
-        
-        st.plotly_chart(fig, width='stretch')
+        # Equity Curve with Drawdown; float32 is plenty at pixel resolution
+        # and halves the payload Plotly ships to the browser. Long histories
+        # are LTTB-downsampled to ~2000 points - the browser can't show more
+        # anyway - and both curves keep the same x samples. The figure itself
+        # is cached on the plotted arrays.
+        curve_x = results['equity_curve'].index.to_numpy()
+        curve_eq = results['equity_curve'].to_numpy(dtype=np.float32, copy=False)
+        curve_dd = results['drawdown_curve'].to_numpy(dtype=np.float32, copy=False)
+        if len(curve_x) > 2000:
+            keep = lttb_indices(results['equity_curve'].to_numpy())
+            curve_x, curve_eq, curve_dd = curve_x[keep], curve_eq[keep], curve_dd[keep]
+
+        st.plotly_chart(build_equity_fig(curve_x, curve_eq, curve_dd), width='stretch')
         
         # Win/Loss Distribution & Grades
         col1, col2 = st.columns(2)
@@ -221,7 +390,7 @@ if uploaded_file:
                 losses_data = results['processed_df'][results['processed_df']['FifoPnlRealized'] < 0]['FifoPnlRealized']
                 
                 fig_hist.add_trace(go.Histogram(
-                    x=wins_data,
+                    x=wins_data.to_numpy(dtype=np.float32, copy=False),
                     name='Wins',
                     marker_color='#00cc00',
                     opacity=0.7,
@@ -229,7 +398,7 @@ if uploaded_file:
                 ))
                 
                 fig_hist.add_trace(go.Histogram(
-                    x=losses_data,
+                    x=losses_data.to_numpy(dtype=np.float32, copy=False),
                     name='Losses',
                     marker_color='#ff3333',
                     opacity=0.7,
@@ -254,33 +423,12 @@ if uploaded_file:
                 'C': '#ff9900', 'D': '#ff6600', 'F': '#ff3333'
             }
             
-            grades = []
-            counts = []
-            colors = []
-            
-            for grade in grade_order:
-                if grade in results['grade_distribution']:
-                    grades.append(grade)
-                    counts.append(results['grade_distribution'][grade])
-                    colors.append(grade_colors.get(grade, '#cccccc'))
-            
-            fig_grades = go.Figure(data=[
-                go.Bar(
-                    x=grades,
-                    y=counts,
-                    marker_color=colors,
-                    text=counts,
-                    textposition='auto'
-                )
-            ])
-            
-            fig_grades.update_layout(
-                xaxis_title='Grade',
-                yaxis_title='Number of Trades',
-                height=400
-            )
-            
-            st.plotly_chart(fig_grades, width='stretch')
+            gd = results['grade_distribution']
+            grades = tuple(g for g in grade_order if g in gd)
+            counts = tuple(gd[g] for g in grades)
+            colors = tuple(grade_colors[g] for g in grades)
+
+            st.plotly_chart(build_grade_fig(grades, counts, colors), width='stretch')
         
         # Fear Index
         st.subheader("🧠 Fear Index")
@@ -302,56 +450,40 @@ if uploaded_file:
                 st.success("Good discipline - letting winners run!")
         
         with col2:
-            # Gauge chart for fear index
-            fig_gauge = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=results['fear_index'],
-                domain={'x': [0, 1], 'y': [0, 1]},
-                title={'text': "Fear Index"},
-                gauge={
-                    'axis': {'range': [0, 100]},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 30], 'color': "lightgreen"},
-                        {'range': [30, 50], 'color': "yellow"},
-                        {'range': [50, 100], 'color': "lightcoral"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': 50
-                    }
-                }
-            ))
-            
-            fig_gauge.update_layout(height=300)
-            st.plotly_chart(fig_gauge, width='stretch')
+            # Gauge chart for fear index (cached on the scalar)
+            st.plotly_chart(build_fear_gauge(float(results['fear_index'])), width='stretch')
     
-    # ========== TAB 3: SYMBOL ANALYSIS ==========
-    with tab3:
+    # ========== VIEW 3: SYMBOL ANALYSIS ==========
+    elif view == "🎯 Symbol Analysis":
         st.header("Per-Symbol Performance")
         
-        st.info("💡 **Symbols highlighted in blue have open positions**")
-        
-        # Format the dataframe
-        symbol_df = results['symbol_stats'].copy()
-        
-        # Color code the net P/L
-        def color_pnl(val):
-            color = 'green' if val > 0 else 'red' if val < 0 else 'gray'
-            return f'color: {color}'
-        
-        if not symbol_df.empty:
-            styled_df = symbol_df.style.map(color_pnl, subset=['NetPnL'])
-        # Highlight symbols with open positions
-        def highlight_open(row):
-            if row.get('HasOpenPosition', False):
-                return ['background-color: #172d43'] * len(row)
-            return [''] * len(row)
-        
-        styled_df = styled_df.apply(highlight_open, axis=1)
-        
-        st.dataframe(styled_df, width='stretch', height=400)
+        st.info("💡 **Symbols marked 🔵 have open positions**")
+
+        symbol_df = results['symbol_stats']
+
+        # Plain dataframe + column_config instead of a Styler: no per-cell
+        # style dicts built in Python, columns stay numeric for sorting, and
+        # an icon column replaces the full-row open-position highlight
+        display_symbols = symbol_df.assign(
+            Open=np.where(symbol_df.get('HasOpenPosition', False), '🔵', '')
+        )
+        display_symbols = display_symbols[['Open'] + [c for c in symbol_df.columns if c != 'HasOpenPosition']]
+
+        st.dataframe(
+            display_symbols,
+            column_config={
+                'Open': st.column_config.TextColumn('Open', width='small'),
+                'NetPnL': st.column_config.NumberColumn('Net P/L', format='$%.2f'),
+                'Fees': st.column_config.NumberColumn('Fees', format='$%.2f'),
+                'WinRate': st.column_config.NumberColumn('Win Rate', format='%.1f %%'),
+                'AvgPnL': st.column_config.NumberColumn('Avg P/L', format='$%.2f'),
+                'BestTrade': st.column_config.NumberColumn('Best Trade', format='$%.2f'),
+                'WorstTrade': st.column_config.NumberColumn('Worst Trade', format='$%.2f')
+            },
+            hide_index=True,
+            width='stretch',
+            height=400
+        )
         
         # Top performers chart
         st.subheader("Top 10 Symbols by Net P/L")
@@ -359,11 +491,11 @@ if uploaded_file:
         
         fig_symbols = go.Figure(data=[
             go.Bar(
-                x=top_10['NetPnL'],
-                y=top_10['Symbol'],
+                x=top_10['NetPnL'].to_numpy(),
+                y=top_10['Symbol'].to_numpy(),
                 orientation='h',
-                marker_color=['green' if x > 0 else 'red' for x in top_10['NetPnL']],
-                text=[f"${x:,.2f}" for x in top_10['NetPnL']],
+                marker_color=np.where(top_10['NetPnL'].to_numpy() > 0, 'green', 'red').tolist(),
+                texttemplate='$%{x:,.2f}',
                 textposition='auto'
             )
         ])
@@ -377,8 +509,8 @@ if uploaded_file:
         
         st.plotly_chart(fig_symbols, width='stretch')
     
-    # ========== TAB 4: TIME ANALYSIS ==========
-    with tab4:
+    # ========== VIEW 4: TIME ANALYSIS ==========
+    elif view == "📅 Time Analysis":
         st.header("Time-Based Analysis")
         
         # Day of week performance
@@ -390,10 +522,10 @@ if uploaded_file:
             
             fig_dow = go.Figure(data=[
                 go.Bar(
-                    x=dow_df['Day'],
-                    y=dow_df['Total P/L'],
-                    marker_color=['green' if x > 0 else 'red' for x in dow_df['Total P/L']],
-                    text=[f"${x:,.0f}" for x in dow_df['Total P/L']],
+                    x=dow_df['Day'].to_numpy(),
+                    y=dow_df['Total P/L'].to_numpy(),
+                    marker_color=np.where(dow_df['Total P/L'].to_numpy() > 0, 'green', 'red').tolist(),
+                    texttemplate='$%{y:,.0f}',
                     textposition='auto'
                 )
             ])
@@ -415,10 +547,10 @@ if uploaded_file:
             
             fig_monthly = go.Figure(data=[
                 go.Bar(
-                    x=monthly_df['Month'],
-                    y=monthly_df['Total P/L'],
-                    marker_color=['green' if x > 0 else 'red' for x in monthly_df['Total P/L']],
-                    text=[f"${x:,.0f}" for x in monthly_df['Total P/L']],
+                    x=monthly_df['Month'].to_numpy(),
+                    y=monthly_df['Total P/L'].to_numpy(),
+                    marker_color=np.where(monthly_df['Total P/L'].to_numpy() > 0, 'green', 'red').tolist(),
+                    texttemplate='$%{y:,.0f}',
                     textposition='auto'
                 )
             ])
@@ -431,19 +563,19 @@ if uploaded_file:
             st.plotly_chart(fig_monthly, width='stretch')
             st.dataframe(monthly_df, width='stretch')
     
-    # ========== TAB 5: BEST/WORST TRADES ==========
-    with tab5:
+    # ========== VIEW 5: BEST/WORST TRADES ==========
+    elif view == "🏆 Best/Worst Trades":
         st.header("🏆 Top Winners & Losers")
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("🌟 Top 5 Winners")
-            winners_df = results['top_winners'].copy()
+            winners_df = results['top_winners']
             if not winners_df.empty:
-                winners_df['TradeDate'] = pd.to_datetime(winners_df['TradeDate']).dt.strftime('%Y-%m-%d')
                 st.dataframe(
                     winners_df.style.format({
+                        'TradeDate': lambda t: t.strftime('%Y-%m-%d'),
                         'FifoPnlRealized': '${:,.2f}',
                         'IBCommission': '${:,.2f}'
                     }),
@@ -452,24 +584,24 @@ if uploaded_file:
         
         with col2:
             st.subheader("💔 Top 5 Losers")
-            losers_df = results['top_losers'].copy()
+            losers_df = results['top_losers']
             if not losers_df.empty:
-                losers_df['TradeDate'] = pd.to_datetime(losers_df['TradeDate']).dt.strftime('%Y-%m-%d')
                 st.dataframe(
                     losers_df.style.format({
+                        'TradeDate': lambda t: t.strftime('%Y-%m-%d'),
                         'FifoPnlRealized': '${:,.2f}',
                         'IBCommission': '${:,.2f}'
                     }),
                     width='stretch'
                 )
     
-    # ========== TAB 6: HOLDINGS DASHBOARD ==========
-    with tab6:
+    # ========== VIEW 6: HOLDINGS DASHBOARD ==========
+    elif view == "💼 Holdings Dashboard":
         st.header("💼 Current Holdings Dashboard")
         
         # Analyze current holdings
         with st.spinner("Fetching current prices and sector data..."):
-            holdings_data = analyze_current_holdings(df_filtered)
+            holdings_data = run_holdings_analysis(file_bytes, filter_start, filter_end, symbols_key)
         
         if holdings_data['holdings'].empty:
             st.info("📭 No open positions found. All positions are closed.")
@@ -477,8 +609,8 @@ if uploaded_file:
             # Portfolio Summary
             st.subheader("📊 Portfolio Summary")
             
-            # Calculate totals
-            total_cost_basis = holdings_data['holdings']['Cost Basis'].sum()
+            # Calculate totals straight off the ndarray
+            total_cost_basis = float(holdings_data['holdings']['Cost Basis'].to_numpy().sum())
             total_market_value = holdings_data['total_market_value']
             total_unrealized_pnl = total_market_value - total_cost_basis
             total_unrealized_pnl_pct = (total_unrealized_pnl / total_cost_basis * 100) if total_cost_basis > 0 else 0
@@ -526,36 +658,20 @@ if uploaded_file:
             # Pie chart
             sector_df = holdings_data['sector_allocation']
             
-            fig_pie = go.Figure(data=[go.Pie(
-                labels=sector_df['Sector'],
-                values=sector_df['Market Value'],
-                hole=0.4,
-                textinfo='label+percent',
-                hovertemplate='<b>%{label}</b><br>' +
-                                'Value: $%{value:,.2f}<br>' +
-                                'Percentage: %{percent}<br>' +
-                                '<extra></extra>'
-            )])
-            
-            fig_pie.update_layout(
-                showlegend=True,
-                height=500,
-                title="Portfolio by Sector",
-                margin=dict(l=20, r=20, t=40, b=100)  # Add this line! b=bottom padding
+            st.plotly_chart(
+                build_sector_pie(sector_df['Sector'].to_numpy(), sector_df['Market Value'].to_numpy()),
+                width='stretch'
             )
-            
-            st.plotly_chart(fig_pie, width='stretch')
         
             st.divider()
 
             #with col2:
             st.subheader("📋 Sector Breakdown")
                 
-            # Format sector allocation table - keep numeric for sorting
-            sector_display = sector_df.copy()
-            
+            # Sector allocation table - keep numeric for sorting; no copy
+            # needed, the frame is displayed as-is
             st.dataframe(
-                sector_display,
+                sector_df,
                 column_config={
                     'Sector': st.column_config.TextColumn('Sector',width='None'),
                     'Market Value': st.column_config.NumberColumn('Market Value', format='$%.2f',width='None'),
@@ -571,16 +687,17 @@ if uploaded_file:
             # Holdings Table
             st.subheader("📈 Individual Holdings")
             
-            holdings_display = holdings_data['holdings'].copy()
-            
-            # Reorder columns for better readability
-            column_order = ['Symbol', 'Quantity', 'Avg Cost', 'Current Price', 'Cost Basis', 
-                           'Market Value', 'Unrealized P/L', 'Unrealized P/L %', '% of Portfolio', 
+            # Reorder columns for better readability (the selection is already
+            # a new frame, so no defensive copy is needed)
+            column_order = ['Symbol', 'Quantity', 'Avg Cost', 'Current Price', 'Cost Basis',
+                           'Market Value', 'Unrealized P/L', 'Unrealized P/L %', '% of Portfolio',
                            'Sector', 'Industry', 'Last Trade Date']
-            holdings_display = holdings_display[column_order]
+            holdings_display = holdings_data['holdings'][column_order]
             
-            # Convert Last Trade Date to datetime for proper display
-            holdings_display['Last Trade Date'] = pd.to_datetime(holdings_display['Last Trade Date'])
+            # Last Trade Date is usually already datetime64 (load_csv parses
+            # TradeDate); only convert when the analyzer got raw strings
+            if not pd.api.types.is_datetime64_any_dtype(holdings_display['Last Trade Date']):
+                holdings_display['Last Trade Date'] = pd.to_datetime(holdings_display['Last Trade Date'])
             
             # Define column configuration with proper formatting
             # This keeps numeric values for sorting while displaying formatted
@@ -609,22 +726,10 @@ if uploaded_file:
                 'Last Trade Date': st.column_config.DateColumn('Last Trade', format='YYYY-MM-DD',width='None')
             }
             
-            # Color code P/L columns
-            def color_negative_red(val):
-                if isinstance(val, (int, float)):
-                    color = 'red' if val < 0 else 'green' if val > 0 else 'black'
-                    return f'color: {color}'
-                return ''
-            
-            # Apply styling
-            styled_holdings = holdings_display.style.map(
-                color_negative_red,
-                subset=['Unrealized P/L', 'Unrealized P/L %']
-            )
-            
-            # Display table with proper column config and styling
+            # Display table with proper column config; column_config formats
+            # in the frontend, so no Styler pass over every cell is needed
             st.dataframe(
-                styled_holdings,
+                holdings_display,
                 column_config=column_config,
                 use_container_width=True,
                 hide_index=True,
@@ -636,18 +741,22 @@ if uploaded_file:
             # Top Holdings
             col1, col2 = st.columns(2)
             
+            # O(N) partition-based top-k instead of nlargest's full sort,
+            # computed once and shared by both column blocks below
+            mv = holdings_data['holdings']['Market Value'].to_numpy()
+            idx = np.argpartition(-mv, min(4, mv.size - 1))[:5]
+            top_5 = holdings_data['holdings'].iloc[idx].sort_values('Market Value', ascending=False)
+
             with col1:
                 st.subheader("🏆 Top 5 Holdings by Value")
-                
-                top_5 = holdings_data['holdings'].nlargest(5, 'Market Value')
-                
+
                 fig_top = go.Figure(data=[
                     go.Bar(
-                        x=top_5['Market Value'],
-                        y=top_5['Symbol'],
+                        x=top_5['Market Value'].to_numpy(),
+                        y=top_5['Symbol'].to_numpy(),
                         orientation='h',
                         marker_color='#00cc00',
-                        text=[f"${x:,.0f}" for x in top_5['Market Value']],
+                        texttemplate='$%{x:,.0f}',
                         textposition='auto'
                     )
                 ])
@@ -695,20 +804,21 @@ if uploaded_file:
                 else:
                     st.success("✅ Good sector diversification")
 
-    # ========== TAB 7: RAW DATA ==========
-    with tab7:
+    # ========== VIEW 7: RAW DATA ==========
+    elif view == "📄 Raw Data":
         st.header("📄 Raw Trade Data")
         
         if not results['processed_df'].empty:
             display_df = results['processed_df'][
-                ['TradeDate', 'Symbol', 'Buy/Sell', 'Quantity', 
+                ['TradeDate', 'Symbol', 'Buy/Sell', 'Quantity',
                  'FifoPnlRealized', 'IBCommission', 'Grade']
-            ].copy()
-            
-            display_df['TradeDate'] = pd.to_datetime(display_df['TradeDate']).dt.strftime('%Y-%m-%d %H:%M:%S')
-            
+            ]
+
+            # TradeDate stays datetime64; the Styler formats only the rows
+            # Streamlit actually renders instead of materializing N strings
             st.dataframe(
                 display_df.style.format({
+                    'TradeDate': lambda t: t.strftime('%Y-%m-%d %H:%M:%S'),
                     'FifoPnlRealized': '${:,.2f}',
                     'IBCommission': '${:,.2f}',
                     'Quantity': '{:,.0f}'
@@ -717,10 +827,11 @@ if uploaded_file:
                 height=600
             )
             
-            csv = display_df.to_csv(index=False)
+            # Deferred serialization - the CSV is only built when the user
+            # actually clicks Download, not on every rerun
             st.download_button(
                 label="📥 Download Processed Data",
-                data=csv,
+                data=lambda: display_df.to_csv(index=False).encode('utf-8'),
                 file_name="processed_trades.csv",
                 mime="text/csv"
             )